@@ -2,15 +2,26 @@
 from __future__ import annotations
 
 import argparse
-import json
-import requests
+import asyncio
+import cachetools
+import functools
+import hashlib
+import importlib
+import operator
+import os
+import re
 import yaml
-from typing import Any, Dict, List, Literal, TypedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Tuple, TypedDict
 
 from typing_extensions import NotRequired
 from rich.console import Console
 from rich.table import Table
 
+import aiohttp
+import orjson
+
 # LangGraph
 from langgraph.graph import StateGraph, END
 
@@ -41,6 +52,7 @@ class SupportState(TypedDict, total=False):
     customer_history: NotRequired[List[Dict[str, Any]]]
 
     # Clarification loop
+    needs_clarification: NotRequired[bool]
     clarification_question: NotRequired[str]
     clarification_answer: NotRequired[str]
 
@@ -57,46 +69,202 @@ class SupportState(TypedDict, total=False):
     closed: NotRequired[bool]
 
     # Output / messaging
+    # Parallel CREATE branches each add their draft here; the CREATE node picks one
+    draft_candidates: Annotated[Dict[str, str], operator.or_]
     draft_response: NotRequired[str]
     api_actions: NotRequired[List[str]]
     notifications: NotRequired[List[str]]
 
-    # Logging
-    logs: NotRequired[List[str]]
+    # Logging (attached by COMPLETE from the run's trace)
+    logs: NotRequired[List[Any]]
+
+
+# Set LOG_VERBOSE=0 to skip recording ability results entirely
+LOG_VERBOSE = os.getenv("LOG_VERBOSE", "1").lower() not in ("0", "false", "no")
+
+# Execution logs of the current run, kept out of the state so they are not
+# re-serialized with every ability call. run() sets a fresh list before ainvoke;
+# node tasks copy that context, so every node of the run appends to the same list
+# while concurrent runs (even for the same ticket) stay separate.
+TRACE: ContextVar[List[Any]] = ContextVar("TRACE")
+
+
+def trace() -> List[Any]:
+    try:
+        return TRACE.get()
+    except LookupError:
+        # Graph invoked outside run(): keep logs for this context only
+        entries: List[Any] = []
+        TRACE.set(entries)
+        return entries
 
 
 def log(state: SupportState, message: str) -> None:
-    state.setdefault("logs", []).append(message)
+    trace().append(message)
+
+
+def log_result(state: SupportState, server: str, ability: str, result: Dict[str, Any]) -> None:
+    """Record an ability result; it is only serialized when the logs are rendered."""
+    if LOG_VERBOSE:
+        trace().append(("ability", server, ability, result))
+
+
+def format_log(entry: Any) -> str:
+    if isinstance(entry, tuple):
+        _, server, ability, result = entry
+        return f"[{server}] {ability} → {orjson.dumps(result, default=str).decode()}"
+    return entry
 
 
 # ---------------------------
 # MCP HTTP client
 # ---------------------------
 
+_SESSION: aiohttp.ClientSession | None = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Shared keep-alive session for all MCP clients (created on the running loop)."""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            # Bursts beyond the per-host cap wait for a pooled connection
+            # instead of opening sockets until file descriptors run out.
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=50,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            ),
+            # connect covers waiting for a free pooled connection plus the TCP connect
+            timeout=aiohttp.ClientTimeout(total=None, connect=5.0, sock_connect=3.0, sock_read=30.0),
+        )
+    return _SESSION
+
+
+async def close_session() -> None:
+    global _SESSION
+    if _SESSION is not None:
+        await _SESSION.close()
+        _SESSION = None
+
+
 class MCPClientHTTP:
     def __init__(self, name: str, base_url: str, api_key: str | None = None):
         self.name = name
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
 
-    def call(self, ability: str, payload: Dict[str, Any], state: SupportState) -> Dict[str, Any]:
+        self.headers = {"Content-Type": "application/json"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+    async def call(self, ability: str, payload: Dict[str, Any], state: SupportState) -> Dict[str, Any]:
         url = f"{self.base_url}/abilities/{ability}"
-        headers = {"Content-Type": "application/json"}
-        if self.api_key:
-            headers["Authorization"] = f"Bearer {self.api_key}"
+        body = {"payload": payload, "state": project_state(ability, state)}
+
+        try:
+            async with get_session().post(url, headers=self.headers, data=orjson.dumps(body)) as resp:
+                resp.raise_for_status()
+                result = orjson.loads(await resp.read())
+            log_result(state, self.name, ability, result)
+            return result
+        except Exception as e:
+            log(state, f"[{self.name}] {ability} failed: {str(e)}")
+            return {}
+
+    async def call_batch(self, abilities: List[str], state: SupportState) -> List[Dict[str, Any]]:
+        """Run several abilities in a single request to this server."""
+        if len(abilities) == 1:
+            return [await self.call(abilities[0], {}, state)]
+
+        url = f"{self.base_url}/abilities:batch"
+        body = {"calls": [
+            {"ability": ab, "payload": {}, "state": project_state(ab, state)} for ab in abilities
+        ]}
+
+        try:
+            async with get_session().post(url, headers=self.headers, data=orjson.dumps(body)) as resp:
+                resp.raise_for_status()
+                entries = orjson.loads(await resp.read())["results"]
+        except Exception as e:
+            for ability in abilities:
+                log(state, f"[{self.name}] {ability} failed: {str(e)}")
+            return [{} for _ in abilities]
+
+        results = []
+        for ability, entry in zip(abilities, entries):
+            if "error" in entry:
+                log(state, f"[{self.name}] {ability} failed: {entry['error']}")
+                results.append({})
+            else:
+                log_result(state, self.name, ability, entry["result"])
+                results.append(entry["result"])
+        return results
 
-        body = {"payload": payload, "state": state}
 
+class MCPClientInproc:
+    """Calls an MCP server module imported into this process, skipping HTTP.
+
+    Used when the server URL in the config is ``inproc://<name>``, which loads
+    ``<name>_mcp`` and dispatches through its ``REGISTRY``.
+    """
+
+    def __init__(self, name: str, module_name: str):
+        self.name = name
+        self.module = importlib.import_module(module_name)
+        self._startup: asyncio.Future | None = None
+
+    async def call(self, ability: str, payload: Dict[str, Any], state: SupportState) -> Dict[str, Any]:
         try:
-            resp = requests.post(url, headers=headers, json=body, timeout=30)
-            resp.raise_for_status()
-            result = resp.json()
-            log(state, f"[{self.name}] {ability} → {json.dumps(result, ensure_ascii=False)}")
+            # Concurrent first calls all wait on the same startup
+            if self._startup is None:
+                self._startup = asyncio.ensure_future(self.module.startup())
+            await self._startup
+            handler = self.module.REGISTRY[ability]
+            result = await handler(self.module.Request(payload=payload, state=project_state(ability, state)))
+            log_result(state, self.name, ability, result)
             return result
         except Exception as e:
             log(state, f"[{self.name}] {ability} failed: {str(e)}")
             return {}
 
+    async def call_batch(self, abilities: List[str], state: SupportState) -> List[Dict[str, Any]]:
+        return list(await asyncio.gather(*(self.call(ab, {}, state) for ab in abilities)))
+
+    async def close(self) -> None:
+        if self._startup is not None:
+            self._startup = None
+            await self.module.shutdown()
+
+
+def make_client(name: str, url: str) -> MCPClientHTTP | MCPClientInproc:
+    if url.startswith("inproc://"):
+        return MCPClientInproc(name, f"{url[len('inproc://'):]}_mcp")
+    return MCPClientHTTP(name, url)
+
+
+async def close_clients() -> None:
+    await close_session()
+    for client in CLIENTS.values():
+        if isinstance(client, MCPClientInproc):
+            await client.close()
+
+
+@asynccontextmanager
+async def clients():
+    """Keep the shared HTTP session and in-process servers open for the block.
+
+    The session and in-process servers are shared by every run on the loop, so
+    they are closed by the caller once, not by each run(); wrap all runs
+    (including concurrent ones) in a single block.
+    """
+    try:
+        yield
+    finally:
+        await close_clients()
+
 
 # ---------------------------
 # Load configuration
@@ -111,8 +279,8 @@ CONFIG = load_config()
 
 # Build clients from config
 CLIENTS = {
-    "COMMON": MCPClientHTTP("COMMON", CONFIG["servers"]["COMMON"]),  # OpenAI MCP
-    "ATLAS": MCPClientHTTP("ATLAS", CONFIG["servers"]["ATLAS"]),     # MongoDB MCP
+    "COMMON": make_client("COMMON", CONFIG["servers"]["COMMON"]),  # OpenAI MCP
+    "ATLAS": make_client("ATLAS", CONFIG["servers"]["ATLAS"]),     # MongoDB MCP
 }
 
 # Build ability mapping dynamically from stages in config
@@ -128,139 +296,352 @@ for stage in CONFIG["stages"]:
             ABILITY_TO_CLIENT[ab] = servers
 
 
-def call_ability(ability: str, payload: Dict[str, Any], state: SupportState) -> Dict[str, Any]:
-    server = ABILITY_TO_CLIENT.get(ability, "COMMON")
-    client = CLIENTS[server]
-    return client.call(ability, payload, state)
+class _AbilityClients(dict):
+    """Ability → client lookup; unknown abilities go to COMMON without growing the map."""
+
+    def __missing__(self, ability: str) -> MCPClientHTTP | MCPClientInproc:
+        return CLIENTS["COMMON"]
+
+
+# Resolved once so call sites do a single dict lookup
+ABILITY_CLIENT = _AbilityClients({ab: CLIENTS[srv] for ab, srv in ABILITY_TO_CLIENT.items()})
+
+
+# ---------------------------
+# Ability state projection
+# ---------------------------
+
+# State fields each ability reads on the MCP side. Only these are shipped with
+# the call (and used to key the response cache); unlisted abilities get the
+# whole state minus logs.
+ABILITY_STATE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    # COMMON
+    "accept_payload": (),
+    "parse_request_text": ("query",),
+    "normalize_fields": ("email", "priority"),
+    "add_flags_calculations": ("priority",),
+    "solution_evaluation": ("kb_results", "clarification_answer"),
+    "update_payload": ("solution_score", "escalated"),
+    "store_answer": ("clarification_answer",),
+    "store_data": ("kb_results",),
+    "response_generation": ("customer_name", "escalated"),
+    "extract_intent": ("query",),
+    "sentiment_analysis": ("query",),
+    "generate_response": ("customer_name", "escalated", "query", "entities", "kb_results"),
+    # ATLAS
+    "extract_entities": ("query",),
+    "enrich_records": ("normalized", "customer_name"),
+    "get_customer_history": ("normalized",),
+    "clarify_question": ("query", "intent"),
+    "extract_answer": ("clarification_answer",),
+    "knowledge_base_search": ("query", "intent"),
+    "search_knowledge_base": ("query", "intent"),
+    "escalation_decision": ("priority", "sentiment"),
+    "update_ticket": ("ticket_id", "escalated", "priority", "sentiment"),
+    "close_ticket": ("escalated",),
+    "update_ticket_status": ("escalated",),
+    "store_ticket": (
+        "ticket_id", "customer_name", "normalized", "query", "priority",
+        "intent", "sentiment", "status", "escalated",
+    ),
+    "execute_api_calls": ("intent", "escalated"),
+    "trigger_notifications": ("customer_name", "escalated"),
+}
+
+# Abilities that echo or persist the complete state, logs included
+FULL_STATE_ABILITIES = frozenset({"output_payload", "store_conversation_log"})
+
+
+def project_state(ability: str, state: SupportState) -> Dict[str, Any]:
+    if ability in FULL_STATE_ABILITIES:
+        # Raw result tuples stay in-process; servers get (and persist) the log lines
+        return {**state, "logs": [format_log(entry) for entry in state.get("logs", []) + trace()]}
+    fields = ABILITY_STATE_FIELDS.get(ability)
+    if fields is None:
+        return {k: v for k, v in state.items() if k != "logs"}
+    return {k: state[k] for k in fields if k in state}
+
+
+# ---------------------------
+# Ability response cache
+# ---------------------------
+
+# Abilities with side effects (writes, notifications, timestamps) or sampled output always go to the server,
+# as do reads of data this agent itself keeps changing (tickets written by UPDATE/store_ticket).
+NON_CACHEABLE_ABILITIES = frozenset({
+    "accept_payload", "output_payload", "enrich_records", "get_customer_history",
+    "generate_response",  # sampled at temperature 0.7; COMMON leaves it uncached too
+    "update_ticket", "update_ticket_status", "store_ticket",
+    "execute_api_calls", "trigger_notifications", "store_conversation_log",
+})
+
+# Reads of mutable data get a short TTL instead of the default hour; Atlas already
+# caches KB searches for 5 minutes, so this only absorbs bursts.
+ABILITY_CACHE_TTL = {
+    "search_knowledge_base": 60.0,
+    "knowledge_base_search": 60.0,
+}
+
+
+class ResponseCache:
+    """LRU of ability responses; each entry expires after its ability's TTL."""
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._entries: cachetools.TLRUCache[Tuple[str, bytes], Dict[str, Any]] = cachetools.TLRUCache(
+            maxsize=max_entries, ttu=self._expires_at
+        )
+
+    def _expires_at(self, key: Tuple[str, bytes], value: Dict[str, Any], now: float) -> float:
+        return now + ABILITY_CACHE_TTL.get(key[0], self.ttl)
+
+    @staticmethod
+    def key(ability: str, payload: Dict[str, Any], state: SupportState) -> Tuple[str, bytes]:
+        raw = orjson.dumps([ability, payload, project_state(ability, state)], option=orjson.OPT_SORT_KEYS, default=str)
+        return ability, hashlib.blake2b(raw).digest()
+
+    def lookup(
+        self, ability: str, payload: Dict[str, Any], state: SupportState
+    ) -> Tuple[Tuple[str, bytes] | None, Dict[str, Any] | None]:
+        """Return (key, cached result); key is None for abilities that never cache."""
+        if ability in NON_CACHEABLE_ABILITIES:
+            return None, None
+        key = self.key(ability, payload, state)
+        hit = self._entries.get(key)
+        if hit is not None:
+            log(state, f"[CACHE] {ability} hit")
+            return key, dict(hit)
+        return key, None
+
+    def store(self, key: Tuple[str, bytes] | None, result: Dict[str, Any]) -> None:
+        # Failed calls come back empty, or as a fallback carrying "error"; don't pin them
+        if key is not None and result and "error" not in result:
+            self._entries[key] = dict(result)
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def cached_ability(
+    fn: Callable[[str, Dict[str, Any], SupportState], Awaitable[Dict[str, Any]]]
+) -> Callable[[str, Dict[str, Any], SupportState], Awaitable[Dict[str, Any]]]:
+    @functools.wraps(fn)
+    async def wrapper(ability: str, payload: Dict[str, Any], state: SupportState) -> Dict[str, Any]:
+        key, hit = RESPONSE_CACHE.lookup(ability, payload, state)
+        if hit is not None:
+            return hit
+        result = await fn(ability, payload, state)
+        RESPONSE_CACHE.store(key, result)
+        return result
+
+    return wrapper
+
+
+@cached_ability
+async def call_ability(ability: str, payload: Dict[str, Any], state: SupportState) -> Dict[str, Any]:
+    return await ABILITY_CLIENT[ability].call(ability, payload, state)
+
+
+async def call_abilities(abilities: List[str], state: SupportState) -> List[Dict[str, Any]]:
+    """Run sibling abilities with one batch request per server.
+
+    Results come back in the order of ``abilities``; cache hits are served locally.
+    """
+    results: List[Dict[str, Any]] = [{} for _ in abilities]
+    keys: List[Tuple[str, bytes] | None] = [None] * len(abilities)
+    pending: Dict[MCPClientHTTP | MCPClientInproc, List[int]] = {}
+
+    for i, ability in enumerate(abilities):
+        keys[i], hit = RESPONSE_CACHE.lookup(ability, {}, state)
+        if hit is not None:
+            results[i] = hit
+        else:
+            pending.setdefault(ABILITY_CLIENT[ability], []).append(i)
+
+    batches = await asyncio.gather(*(
+        client.call_batch([abilities[i] for i in indexes], state)
+        for client, indexes in pending.items()
+    ))
+    for indexes, batch in zip(pending.values(), batches):
+        for i, result in zip(indexes, batch):
+            results[i] = result
+            RESPONSE_CACHE.store(keys[i], result)
+    return results
+
+
+def merge(*results: Dict[str, Any]) -> Dict[str, Any]:
+    update: Dict[str, Any] = {}
+    for result in results:
+        update.update(result)
+    return update
 
 
 # ---------------------------
 # Stage node functions
 # ---------------------------
 
-def node_intake(state: SupportState) -> Dict[str, Any]:
-    call_ability("accept_payload", {}, state)
+async def node_intake(state: SupportState) -> Dict[str, Any]:
+    await call_ability("accept_payload", {}, state)
     log(state, "INTAKE complete.")
-    return {}
+    # Normalize the email once; ATLAS abilities read it from here
+    return {"normalized": {"email": state.get("email", "").lower().strip()}}
 
 
-def node_understand(state: SupportState) -> Dict[str, Any]:
-    update = {}
-    update.update(call_ability("parse_request_text", {}, state))
-    update.update(call_ability("extract_entities", {}, state))
-    update.update(call_ability("extract_intent", {}, state))
-    update.update(call_ability("sentiment_analysis", {}, state))
+def ability_node(ability: str) -> Callable[[SupportState], Awaitable[Dict[str, Any]]]:
+    """Graph node running a single ability, for the parallel fan-out branches."""
+    async def node(state: SupportState) -> Dict[str, Any]:
+        return await call_ability(ability, {}, state)
+
+    node.__name__ = f"node_{ability}"
+    return node
+
+
+# UNDERSTAND runs as parallel branches joined before PREPARE
+UNDERSTAND_BRANCHES = {
+    "PARSE": "parse_request_text",
+    "ENTITIES": "extract_entities",
+    "INTENT": "extract_intent",
+    "SENTIMENT": "sentiment_analysis",
+}
+
+
+_REPLACEMENT_RE = re.compile(r"replac", re.I)
+# An actual address, not just the word: a house number plus a street word, a US state
+# plus ZIP, or a UK postcode. "Please update my address" still has to go through ASK.
+_ADDRESS_RE = re.compile(
+    r"\b\d+\w*\s+(?:\w+\s+){0,2}(?:street|st|road|rd|avenue|ave|lane|ln|drive|dr|boulevard|blvd)\b"
+    r"|(?-i:\b[A-Z]{2}\s+\d{5}(?:-\d{4})?\b)"
+    r"|(?-i:\b[A-Z]{1,2}\d[A-Z\d]?\s*\d[A-Z]{2}\b)",
+    re.I,
+)
+
+
+def missing_information(state: SupportState) -> bool:
+    """Whether the ticket still lacks what ASK would ask for, judged from UNDERSTAND's output.
+
+    Mirrors clarify_question: replacements need a shipping address, refunds need the
+    customer's choice of refund method, order-status queries need an order id.
+    """
+    answer = state.get("clarification_answer", "")
+    text = f"{state.get('query', '')} {answer}"
+    intent = state.get("intent", "")
+    if intent == "replacement_request" or _REPLACEMENT_RE.search(text):
+        return not _ADDRESS_RE.search(text)
+    if intent == "order_status":
+        return not (state.get("entities") or {}).get("order_id")
+    return not answer
+
+
+async def node_join_understand(state: SupportState) -> Dict[str, Any]:
     log(state, "UNDERSTAND complete.")
-    return update
+    return {"needs_clarification": missing_information(state)}
 
 
-def node_prepare(state: SupportState) -> Dict[str, Any]:
-    update = {}
-    update.update(call_ability("normalize_fields", {}, state))
-    update.update(call_ability("enrich_records", {}, state))
-    update.update(call_ability("add_flags_calculations", {}, state))
-    
-    # Get customer history from MongoDB
-    history_result = call_ability("get_customer_history", {}, state)
-    if history_result:
-        update.update(history_result)
-    
+def clarification_router(state: SupportState) -> str:
+    # Tickets whose details are already complete skip ASK/WAIT
+    if not state.get("needs_clarification", True):
+        log(state, "Router: no clarification needed → RETRIEVE.")
+        return "RETRIEVE"
+    return "ASK"
+
+
+async def node_prepare(state: SupportState) -> Dict[str, Any]:
+    # Customer history comes from MongoDB alongside the other enrichments
+    update = merge(*await call_abilities(
+        ["normalize_fields", "enrich_records", "add_flags_calculations", "get_customer_history"], state
+    ))
     log(state, "PREPARE complete.")
     return update
 
 
-def node_ask(state: SupportState) -> Dict[str, Any]:
-    update = call_ability("clarify_question", {}, state)
+async def node_ask(state: SupportState) -> Dict[str, Any]:
+    update = await call_ability("clarify_question", {}, state)
     log(state, "ASK complete.")
     return update
 
 
-def node_wait(state: SupportState) -> Dict[str, Any]:
-    update = {}
-    update.update(call_ability("extract_answer", {}, state))
-    update.update(call_ability("store_answer", {}, state))
+async def node_wait(state: SupportState) -> Dict[str, Any]:
+    update = merge(*await call_abilities(["extract_answer", "store_answer"], state))
     log(state, "WAIT complete.")
     return update
 
 
-def node_retrieve(state: SupportState) -> Dict[str, Any]:
-    update = {}
+async def node_retrieve(state: SupportState) -> Dict[str, Any]:
     # Search knowledge base using both Atlas and MongoDB
-    update.update(call_ability("knowledge_base_search", {}, state))
-    update.update(call_ability("search_knowledge_base", {}, state))
-    update.update(call_ability("store_data", {}, state))
+    update = merge(*await call_abilities(
+        ["knowledge_base_search", "search_knowledge_base", "store_data"], state
+    ))
     log(state, "RETRIEVE complete.")
     return update
 
 
-def node_decide(state: SupportState) -> Dict[str, Any]:
-    update = call_ability("solution_evaluation", {}, state)
+async def node_decide(state: SupportState) -> Dict[str, Any]:
+    update = await call_ability("solution_evaluation", {}, state)
     log(state, "DECIDE scored solution.")
     return update
 
 
-def decide_router(state: SupportState) -> Literal["UPDATE", "CREATE"]:
+async def decide_router(state: SupportState) -> str | List[str]:
     score = state.get("solution_score", 0)
     if score < 90:
-        state.update(call_ability("escalation_decision", {}, state))
-        state.update(call_ability("update_payload", {}, state))
+        state.update(await call_ability("escalation_decision", {}, state))
+        state.update(await call_ability("update_payload", {}, state))
         log(state, f"Router: score {score} < 90 → UPDATE.")
         return "UPDATE"
     else:
         state.update({"escalated": False})
-        state.update(call_ability("update_payload", {}, state))
+        state.update(await call_ability("update_payload", {}, state))
         log(state, f"Router: score {score} ≥ 90 → CREATE.")
-        return "CREATE"
+        return ["DRAFT_TEMPLATE", "DRAFT_AI"]
 
 
-def node_update(state: SupportState) -> Dict[str, Any]:
-    update = {}
-    # Update ticket in both Atlas and MongoDB
-    update.update(call_ability("update_ticket", {}, state))
-    update.update(call_ability("close_ticket", {}, state))
-    update.update(call_ability("update_ticket_status", {}, state))
-    
-    # Store ticket data in MongoDB
-    call_ability("store_ticket", {}, state)
-    
+async def node_update(state: SupportState) -> Dict[str, Any]:
+    # Update ticket in both Atlas and MongoDB and store the ticket data, all in one ATLAS batch
+    updated, closed, status, _stored = await call_abilities(
+        ["update_ticket", "close_ticket", "update_ticket_status", "store_ticket"], state
+    )
     log(state, "UPDATE complete.")
-    return update
+    return merge(updated, closed, status)
 
 
-def node_create(state: SupportState) -> Dict[str, Any]:
-    update = {}
-    # Generate response using both COMMON and OpenAI
-    update.update(call_ability("response_generation", {}, state))
-    
+async def node_draft_template(state: SupportState) -> Dict[str, Any]:
+    result = await call_ability("response_generation", {}, state)
+    if not result.get("draft_response"):
+        return {}
+    return {"draft_candidates": {"template": result["draft_response"]}}
+
+
+async def node_draft_ai(state: SupportState) -> Dict[str, Any]:
     # Use OpenAI for enhanced response generation
-    openai_response = call_ability("generate_response", {
+    result = await call_ability("generate_response", {
         "system_message": "You are a professional customer support agent. Generate a helpful, empathetic response."
     }, state)
-    
-    if openai_response.get("draft_response"):
-        # Use OpenAI response if available, fallback to common response
-        update["draft_response"] = openai_response["draft_response"]
-    
+    if not result.get("draft_response"):
+        return {}
+    return {"draft_candidates": {"ai": result["draft_response"]}}
+
+
+async def node_create(state: SupportState) -> Dict[str, Any]:
+    candidates = state.get("draft_candidates", {})
+    # Use OpenAI response if available, fallback to common response
+    draft = candidates.get("ai") or candidates.get("template")
     log(state, "CREATE complete.")
-    return update
+    return {"draft_response": draft} if draft else {}
 
 
-def node_do(state: SupportState) -> Dict[str, Any]:
-    update = {}
-    update.update(call_ability("execute_api_calls", {}, state))
-    update.update(call_ability("trigger_notifications", {}, state))
-    
-    # Store conversation log in MongoDB
-    call_ability("store_conversation_log", {}, state)
-    
+async def node_do(state: SupportState) -> Dict[str, Any]:
+    # Conversation log goes to MongoDB in the same ATLAS batch as the API calls and notifications
+    actions, notifications, _log_stored = await call_abilities(
+        ["execute_api_calls", "trigger_notifications", "store_conversation_log"], state
+    )
     log(state, "DO complete.")
-    return update
+    return merge(actions, notifications)
 
 
-def node_complete(state: SupportState) -> Dict[str, Any]:
-    out = call_ability("output_payload", {}, state)
+async def node_complete(state: SupportState) -> Dict[str, Any]:
+    out = await call_ability("output_payload", {}, state)
     log(state, "COMPLETE done.")
-    return out
+    return {**out, "logs": state.get("logs", []) + trace()}
 
 
 # ---------------------------
@@ -271,28 +652,39 @@ def build_graph():
     graph = StateGraph(SupportState)
 
     graph.add_node("INTAKE", node_intake)
-    graph.add_node("UNDERSTAND", node_understand)
+    for name, ability in UNDERSTAND_BRANCHES.items():
+        graph.add_node(name, ability_node(ability))
+    graph.add_node("JOIN_UNDERSTAND", node_join_understand)
     graph.add_node("PREPARE", node_prepare)
     graph.add_node("ASK", node_ask)
     graph.add_node("WAIT", node_wait)
     graph.add_node("RETRIEVE", node_retrieve)
     graph.add_node("DECIDE", node_decide)
     graph.add_node("UPDATE", node_update)
+    graph.add_node("DRAFT_TEMPLATE", node_draft_template)
+    graph.add_node("DRAFT_AI", node_draft_ai)
     graph.add_node("CREATE", node_create)
     graph.add_node("DO", node_do)
     graph.add_node("COMPLETE", node_complete)
 
     graph.set_entry_point("INTAKE")
-    graph.add_edge("INTAKE", "UNDERSTAND")
-    graph.add_edge("UNDERSTAND", "PREPARE")
-    graph.add_edge("PREPARE", "ASK")
+    for name in UNDERSTAND_BRANCHES:
+        graph.add_edge("INTAKE", name)
+    graph.add_edge(list(UNDERSTAND_BRANCHES), "JOIN_UNDERSTAND")
+    graph.add_edge("JOIN_UNDERSTAND", "PREPARE")
+    graph.add_conditional_edges("PREPARE", clarification_router, {"ASK": "ASK", "RETRIEVE": "RETRIEVE"})
     graph.add_edge("ASK", "WAIT")
     graph.add_edge("WAIT", "RETRIEVE")
     graph.add_edge("RETRIEVE", "DECIDE")
 
-    graph.add_conditional_edges("DECIDE", decide_router, {"UPDATE": "UPDATE", "CREATE": "CREATE"})
+    graph.add_conditional_edges(
+        "DECIDE",
+        decide_router,
+        {"UPDATE": "UPDATE", "DRAFT_TEMPLATE": "DRAFT_TEMPLATE", "DRAFT_AI": "DRAFT_AI"},
+    )
 
     graph.add_edge("UPDATE", "DO")
+    graph.add_edge(["DRAFT_TEMPLATE", "DRAFT_AI"], "CREATE")
     graph.add_edge("CREATE", "DO")
     graph.add_edge("DO", "COMPLETE")
     graph.add_edge("COMPLETE", END)
@@ -335,7 +727,7 @@ def print_summary(final_state: SupportState) -> None:
         if key in payload and payload[key] not in (None, [], {}):
             value = payload[key]
             if isinstance(value, (dict, list)):
-                display_value = json.dumps(value, ensure_ascii=False, indent=2)
+                display_value = orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
             else:
                 display_value = str(value)
             table.add_row(key, display_value)
@@ -343,8 +735,23 @@ def print_summary(final_state: SupportState) -> None:
     console.print(table)
 
     console.rule("[bold]Execution Logs[/bold]")
-    for line in payload.get("logs", []):
-        console.print(f"- {line}")
+    for entry in payload.get("logs", []):
+        console.print(f"- {format_log(entry)}")
+
+
+async def run(state: SupportState) -> SupportState:
+    """Run one ticket through the graph; call inside ``async with clients()``."""
+    app = build_graph()
+    token = TRACE.set([])
+    try:
+        return await app.ainvoke(state)
+    finally:
+        TRACE.reset(token)
+
+
+async def run_once(state: SupportState) -> SupportState:
+    async with clients():
+        return await run(state)
 
 
 def main():
@@ -353,17 +760,15 @@ def main():
     parser.add_argument("--input", type=str, help='JSON string with input payload.')
     args = parser.parse_args()
 
-    app = build_graph()
-
     if args.demo:
         state: SupportState = dict(DEMO_INPUT)
-        final_state = app.invoke(state)
+        final_state = asyncio.run(run_once(state))
         print_summary(final_state)
         return
 
     if args.input:
-        state = json.loads(args.input)
-        final_state = app.invoke(state)
+        state = orjson.loads(args.input)
+        final_state = asyncio.run(run_once(state))
         print_summary(final_state)
         return
 
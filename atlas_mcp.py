@@ -1,12 +1,19 @@
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Request as HTTPRequest
+from fastapi.responses import JSONResponse
 from typing import Any, Dict, List, Optional
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import ConnectionFailure, OperationFailure
+from bson import ObjectId
 from datetime import datetime
+import asyncio
+import cachetools
 import os
 import json
+import orjson
+import re
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
@@ -21,29 +28,162 @@ DATABASE_NAME = os.getenv("MONGO_DATABASE", "support_system")
 mongo_client = None
 db = None
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    global mongo_client, db
-    print("🚀 Starting up Atlas MCP server...")
+# Keyword patterns used by the request-text abilities, compiled once
+# Order ids are whitespace-delimited tokens starting with "#"; trailing punctuation is dropped
+_ORDER_RE = re.compile(r"(?<!\S)#\w+")
+_URGENCY_RE = re.compile(r"\b(?:urgent|asap|emergency)\b", re.I)
+_REPLACEMENT_RE = re.compile(r"replacement", re.I)
+_ADDRESS_RE = re.compile(r"address", re.I)
+_REFUND_RE = re.compile(r"refund", re.I)
+
+class WriteBuffer:
+    """Queue ticket and conversation-log writes and flush them with bulk_write.
+
+    Writes to the same ticket_id are coalesced into a single upsert. The
+    buffer is flushed every `interval` seconds by a background task started in
+    `lifespan`, or straight away once `max_ops` writes are pending.
+    """
+
+    def __init__(self, max_ops: int = 50, interval: float = 0.1):
+        self.max_ops = max_ops
+        self.interval = interval
+        self._tickets: Dict[Any, Dict[str, Dict[str, Any]]] = {}
+        self._logs: List[Dict[str, Any]] = []
+
+    async def upsert_ticket(self, ticket_id: Any, fields: Dict[str, Any], on_insert: Optional[Dict[str, Any]] = None) -> None:
+        doc = self._tickets.setdefault(ticket_id, {"$set": {}, "$setOnInsert": {}})
+        doc["$set"].update(fields)
+        doc["$setOnInsert"].update(on_insert or {})
+        if len(self._tickets) + len(self._logs) >= self.max_ops:
+            await self.flush()
+
+    async def insert_log(self, doc: Dict[str, Any]) -> None:
+        self._logs.append(doc)
+        if len(self._tickets) + len(self._logs) >= self.max_ops:
+            await self.flush()
+
+    async def flush(self) -> None:
+        tickets, self._tickets = self._tickets, {}
+        logs, self._logs = self._logs, []
+        if db is None:
+            return
+
+        if tickets:
+            ops = []
+            for ticket_id, doc in tickets.items():
+                update = {"$set": doc["$set"]}
+                # A field can't appear in both operators; $set wins
+                on_insert = {k: v for k, v in doc["$setOnInsert"].items() if k not in doc["$set"]}
+                if on_insert:
+                    update["$setOnInsert"] = on_insert
+                ops.append(UpdateOne({"ticket_id": ticket_id}, update, upsert=True))
+            try:
+                await db.tickets.bulk_write(ops, ordered=False)
+            except Exception as e:
+                print(f"⚠️ Warning: ticket bulk write failed: {e}")
+
+        if logs:
+            try:
+                await db.conversation_logs.bulk_write([InsertOne(doc) for doc in logs], ordered=False)
+            except Exception as e:
+                print(f"⚠️ Warning: conversation log bulk write failed: {e}")
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+write_buffer = WriteBuffer()
+
+# Knowledge-base results by normalized search string; FAQ-style queries repeat a lot
+kb_cache: "cachetools.TTLCache[str, Any]" = cachetools.TTLCache(maxsize=1024, ttl=300.0)
+
+# Background write-buffer flusher, running while MongoDB is connected
+flusher = None
+
+KB_TEXT_WEIGHTS = {"title": 10, "content": 1}
+
+# MongoDB error codes that just mean another process got there first
+INDEX_NOT_FOUND = 27
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+
+async def ensure_kb_text_index(database, migrate: bool = False):
+    """Make sure knowledge_base has the title-weighted ``kb_text`` text index.
+
+    MongoDB allows a single text index per collection, and earlier versions created
+    the unweighted default ``title_text_content_text``. Replacing it means dropping
+    it first, which only happens with ``migrate=True`` (once, from ``__main__``,
+    before the workers start); worker startup only creates the index when the
+    collection has no text index at all, so concurrent workers never drop or
+    rebuild it under live searches.
+    """
+    indexes = await database.knowledge_base.index_information()
+    text_indexes = {
+        name: spec for name, spec in indexes.items()
+        if any(kind == "text" for _, kind in spec["key"])
+    }
+    if text_indexes.get("kb_text", {}).get("weights") == KB_TEXT_WEIGHTS:
+        return
+    if text_indexes and not migrate:
+        print(f"⚠️ Warning: knowledge_base has text index(es) {sorted(text_indexes)} instead of the weighted kb_text; "
+              "start the server with `python atlas_mcp.py` to migrate. KB search ranking will not favour titles until then.")
+        return
+    for name in text_indexes:
+        print(f"🔁 Dropping knowledge_base text index {name!r} in favour of weighted kb_text")
+        try:
+            await database.knowledge_base.drop_index(name)
+        except OperationFailure as e:
+            if e.code != INDEX_NOT_FOUND:
+                raise
+    try:
+        await database.knowledge_base.create_index(
+            [("title", "text"), ("content", "text")],
+            weights=KB_TEXT_WEIGHTS,
+            name="kb_text"
+        )
+    except OperationFailure as e:
+        if e.code not in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT):
+            raise
+        print(f"⚠️ knowledge_base text index was created concurrently: {e}")
+        return
+    print("✅ Knowledge base text index kb_text ready")
+
+async def migrate_indexes():
+    """One-off index migration run by the launcher before any worker starts"""
+    client = AsyncIOMotorClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+    try:
+        await ensure_kb_text_index(client[DATABASE_NAME], migrate=True)
+    except Exception as e:
+        print(f"⚠️ Warning: Could not migrate the kb_text index; KB search ranking will not favour titles: {e}")
+    finally:
+        client.close()
+
+async def startup():
+    """Connect to MongoDB, create indexes and start the write buffer"""
+    global mongo_client, db, flusher
     
     try:
         print(f"Attempting to connect to MongoDB: {MONGO_URI}")
-        mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+        mongo_client = AsyncIOMotorClient(MONGO_URI, maxPoolSize=100, serverSelectionTimeoutMS=5000)
         db = mongo_client[DATABASE_NAME]
         
         # Test connection
-        mongo_client.admin.command('ping')
+        await mongo_client.admin.command('ping')
         print(f"✅ Connected to MongoDB database: {DATABASE_NAME}")
         
         # Create indexes
         try:
-            db.tickets.create_index("ticket_id", unique=True)
-            db.customers.create_index("email", unique=True)
-            db.knowledge_base.create_index([("title", "text"), ("content", "text")])
+            await db.tickets.create_index("ticket_id", unique=True)
+            await db.customers.create_index("email", unique=True)
             print("✅ Indexes created successfully")
         except Exception as e:
             print(f"⚠️ Warning: Could not create indexes: {e}")
+        
+        try:
+            await ensure_kb_text_index(db)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not create weighted kb_text index; KB search ranking will not favour titles: {e}")
             
     except ConnectionFailure as e:
         print(f"⚠️ Could not connect to MongoDB: {e}")
@@ -56,35 +196,66 @@ async def lifespan(app: FastAPI):
         mongo_client = None
         db = None
     
-    print("✅ Startup completed")
-    yield
-    
-    # Shutdown
-    print("🔌 Shutting down application...")
+    flusher = asyncio.create_task(write_buffer.run()) if db is not None else None
+
+async def shutdown():
+    """Flush pending writes and close the MongoDB connection"""
+    global flusher
+    if flusher is not None:
+        flusher.cancel()
+        flusher = None
+        await write_buffer.flush()
     if mongo_client is not None:
         mongo_client.close()
         print("🔌 MongoDB connection closed")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("🚀 Starting up Atlas MCP server...")
+    await startup()
+    print("✅ Startup completed")
+    yield
+    print("🔌 Shutting down application...")
+    await shutdown()
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; falls back to str() for ObjectId and friends"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str)
+
 # FastAPI app with lifespan
 app = FastAPI(
     title="Atlas MongoDB MCP Server - Enhanced Debug",
     description="Enhanced version with all required abilities and better error handling",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-class Request(BaseModel):
-    payload: Dict[str, Any] = {}
-    state: Dict[str, Any] = {}
+class Request:
+    """Ability call body. payload and state are free-form, so they are not validated."""
+    __slots__ = ("payload", "state")
+
+    def __init__(self, payload: Optional[Dict[str, Any]] = None, state: Optional[Dict[str, Any]] = None):
+        self.payload = payload or {}
+        self.state = state or {}
+
+async def parse_request(request: HTTPRequest) -> Request:
+    """Decode the ability call body with orjson, skipping model validation"""
+    body = orjson.loads(await request.body() or b"{}")
+    return Request(body.get("payload"), body.get("state"))
 
 def get_mock_response(ability_name: str, state: Dict[str, Any]) -> Dict[str, Any]:
     """Return mock responses when MongoDB is not available"""
+    now = datetime.utcnow()
     mock_responses = {
         "extract_entities": {
             "entities": {
                 "order_id": "#A123" if "#A123" in state.get("query", "") else None,
                 "product_type": "order",
-                "urgency": "high" if "asap" in state.get("query", "").lower() else "medium"
+                "urgency": "high" if _URGENCY_RE.search(state.get("query", "")) else "medium"
             }
         },
         "enrich_records": {
@@ -137,7 +308,7 @@ def get_mock_response(ability_name: str, state: Dict[str, Any]) -> Dict[str, Any
             "ticket_updates": {
                 "status": "in_progress",
                 "assigned_to": "specialist_team",
-                "updated_at": datetime.now().isoformat()
+                "updated_at": now.isoformat()
             }
         },
         "close_ticket": {
@@ -146,7 +317,7 @@ def get_mock_response(ability_name: str, state: Dict[str, Any]) -> Dict[str, Any
         },
         "update_ticket_status": {
             "status": "escalated",
-            "updated_at": datetime.now().isoformat()
+            "updated_at": now.isoformat()
         },
         "store_ticket": {
             "stored": True,
@@ -160,14 +331,14 @@ def get_mock_response(ability_name: str, state: Dict[str, Any]) -> Dict[str, Any
         },
         "store_conversation_log": {
             "log_stored": True,
-            "conversation_id": f"conv_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            "conversation_id": f"conv_{now.strftime('%Y%m%d_%H%M%S')}"
         }
     }
     
     return mock_responses.get(ability_name, {"mock_response": True, "ability": ability_name})
 
 @app.get("/")
-def root():
+async def root():
     return {
         "message": "Atlas MCP Server is running", 
         "version": "2.0.0",
@@ -175,7 +346,7 @@ def root():
     }
 
 @app.get("/health")
-def health_check():
+async def health_check():
     mongo_status = "connected" if db is not None else "disconnected"
     
     return {
@@ -196,7 +367,7 @@ def health_check():
 # All the abilities that should be handled by Atlas MCP according to config
 
 @app.post("/abilities/extract_entities")
-def extract_entities(req: Request):
+async def extract_entities(req: Request = Depends(parse_request)):
     """Extract entities from customer query"""
     if db is None:
         return get_mock_response("extract_entities", req.state)
@@ -206,10 +377,11 @@ def extract_entities(req: Request):
         entities = {}
         
         # Simple entity extraction logic
-        if "#" in query:
-            entities["order_id"] = [word for word in query.split() if word.startswith("#")]
+        order_ids = _ORDER_RE.findall(query)
+        if order_ids:
+            entities["order_id"] = order_ids
         
-        if any(word in query.lower() for word in ["urgent", "asap", "emergency"]):
+        if _URGENCY_RE.search(query):
             entities["urgency"] = "high"
         
         return {"entities": entities}
@@ -217,16 +389,16 @@ def extract_entities(req: Request):
         return get_mock_response("extract_entities", req.state)
 
 @app.post("/abilities/enrich_records")
-def enrich_records(req: Request):
+async def enrich_records(req: Request = Depends(parse_request)):
     """Enrich customer records with additional data"""
     if db is None:
         return get_mock_response("enrich_records", req.state)
     
     try:
-        email = req.state.get("normalized", {}).get("email") or req.state.get("email", "").lower()
+        email = req.state.get("normalized", {}).get("email", "")
         
         # Try to find customer in database
-        customer = db.customers.find_one({"email": email})
+        customer = await db.customers.find_one({"email": email})
         
         if customer:
             enriched = {
@@ -244,13 +416,13 @@ def enrich_records(req: Request):
                 "is_new_customer": True
             }
             
-            db.customers.insert_one({
+            await db.customers.insert_one({
                 "email": email,
                 "name": req.state.get("customer_name"),
                 "tier": "standard",
                 "account_age_days": 0,
                 "total_orders": 0,
-                "created_at": datetime.now()
+                "created_at": datetime.utcnow()
             })
         
         return {"enriched": enriched}
@@ -258,18 +430,19 @@ def enrich_records(req: Request):
         return get_mock_response("enrich_records", req.state)
 
 @app.post("/abilities/get_customer_history")
-def get_customer_history(req: Request):
+async def get_customer_history(req: Request = Depends(parse_request)):
     """Get customer's support history"""
     if db is None:
         return get_mock_response("get_customer_history", req.state)
     
     try:
-        email = req.state.get("normalized", {}).get("email") or req.state.get("email", "").lower()
+        email = req.state.get("normalized", {}).get("email", "")
         
         # Find recent tickets for this customer
-        recent_tickets = list(db.tickets.find(
-            {"customer_email": email}
-        ).sort("created_at", -1).limit(5))
+        recent_tickets = await db.tickets.find(
+            {"customer_email": email},
+            projection={"ticket_id": 1, "created_at": 1, "issue_summary": 1, "status": 1, "resolution": 1, "_id": 0}
+        ).sort("created_at", -1).limit(5).to_list(5)
         
         customer_history = []
         for ticket in recent_tickets:
@@ -286,7 +459,7 @@ def get_customer_history(req: Request):
         return get_mock_response("get_customer_history", req.state)
 
 @app.post("/abilities/clarify_question")
-def clarify_question(req: Request):
+async def clarify_question(req: Request = Depends(parse_request)):
     """Generate clarification question"""
     if db is None:
         return get_mock_response("clarify_question", req.state)
@@ -295,9 +468,9 @@ def clarify_question(req: Request):
         query = req.state.get("query", "")
         intent = req.state.get("intent", "")
         
-        if "replacement" in query.lower() and "address" not in query.lower():
+        if _REPLACEMENT_RE.search(query) and not _ADDRESS_RE.search(query):
             question = "Could you please provide the shipping address for your replacement?"
-        elif "refund" in query.lower():
+        elif _REFUND_RE.search(query):
             question = "Would you prefer a refund to your original payment method or store credit?"
         else:
             question = "Could you provide more details about your request?"
@@ -307,13 +480,13 @@ def clarify_question(req: Request):
         return get_mock_response("clarify_question", req.state)
 
 @app.post("/abilities/extract_answer")
-def extract_answer(req: Request):
+async def extract_answer(req: Request = Depends(parse_request)):
     """Extract information from clarification answer"""
     return {"extracted_info": req.state.get("clarification_answer", "No answer provided")}
 
 @app.post("/abilities/knowledge_base_search") 
 @app.post("/abilities/search_knowledge_base")
-def search_knowledge_base(req: Request):
+async def search_knowledge_base(req: Request = Depends(parse_request)):
     """Search knowledge base for relevant articles"""
     if db is None:
         return get_mock_response("knowledge_base_search", req.state)
@@ -324,26 +497,41 @@ def search_knowledge_base(req: Request):
         
         # Search knowledge base using text search
         search_terms = f"{query} {intent}".strip()
+        cache_key = " ".join(search_terms.lower().split())
+        cached = kb_cache.get(cache_key)
+        if cached is not None:
+            return {"kb_results": cached}
         
-        kb_articles = list(db.knowledge_base.find(
-            {"$text": {"$search": search_terms}}
-        ).limit(3))
+        # Trim content and score server-side so only the snippet crosses the wire
+        content = {"$ifNull": ["$content", ""]}
+        kb_articles = await db.knowledge_base.aggregate([
+            {"$match": {"$text": {"$search": search_terms}}},
+            {"$sort": {"score": {"$meta": "textScore"}}},
+            {"$limit": 3},
+            {"$project": {
+                "title": 1,
+                "snippet": {"$substrCP": [content, 0, 200]},
+                "truncated": {"$gt": [{"$strLenCP": content}, 200]},
+                "score": {"$meta": "textScore"}
+            }}
+        ]).to_list(3)
         
         kb_results = []
         for article in kb_articles:
             kb_results.append({
                 "article_id": str(article.get("_id")),
                 "title": article.get("title", ""),
-                "content": article.get("content", "")[:200] + "..." if len(article.get("content", "")) > 200 else article.get("content", ""),
-                "relevance_score": 0.8  # Mock score
+                "content": article["snippet"] + "..." if article.get("truncated") else article["snippet"],
+                "relevance_score": article.get("score", 0.0)
             })
         
+        kb_cache[cache_key] = kb_results
         return {"kb_results": kb_results}
     except Exception as e:
         return get_mock_response("knowledge_base_search", req.state)
 
 @app.post("/abilities/escalation_decision")
-def escalation_decision(req: Request):
+async def escalation_decision(req: Request = Depends(parse_request)):
     """Decide whether to escalate the ticket"""
     priority = req.state.get("priority", "medium").lower()
     sentiment = req.state.get("sentiment", "neutral")
@@ -356,7 +544,7 @@ def escalation_decision(req: Request):
     }
 
 @app.post("/abilities/update_ticket")
-def update_ticket(req: Request):
+async def update_ticket(req: Request = Depends(parse_request)):
     """Update ticket information"""
     if db is None:
         return get_mock_response("update_ticket", req.state)
@@ -366,23 +554,19 @@ def update_ticket(req: Request):
         
         update_data = {
             "status": "in_progress" if req.state.get("escalated") else "resolved",
-            "updated_at": datetime.now(),
+            "updated_at": datetime.utcnow(),
             "priority": req.state.get("priority", "medium"),
             "sentiment": req.state.get("sentiment", "neutral")
         }
         
-        db.tickets.update_one(
-            {"ticket_id": ticket_id},
-            {"$set": update_data},
-            upsert=True
-        )
+        await write_buffer.upsert_ticket(ticket_id, update_data)
         
         return {"ticket_updates": update_data}
     except Exception as e:
         return get_mock_response("update_ticket", req.state)
 
 @app.post("/abilities/close_ticket")
-def close_ticket(req: Request):
+async def close_ticket(req: Request = Depends(parse_request)):
     """Close or keep ticket open based on status"""
     escalated = req.state.get("escalated", False)
     
@@ -392,17 +576,17 @@ def close_ticket(req: Request):
     }
 
 @app.post("/abilities/update_ticket_status")
-def update_ticket_status(req: Request):
+async def update_ticket_status(req: Request = Depends(parse_request)):
     """Update ticket status"""
     status = "escalated" if req.state.get("escalated") else "resolved"
     
     return {
         "status": status,
-        "updated_at": datetime.now().isoformat()
+        "updated_at": datetime.utcnow().isoformat()
     }
 
 @app.post("/abilities/store_ticket")
-def store_ticket(req: Request):
+async def store_ticket(req: Request = Depends(parse_request)):
     """Store ticket data in MongoDB"""
     if db is None:
         return get_mock_response("store_ticket", req.state)
@@ -411,23 +595,26 @@ def store_ticket(req: Request):
         ticket_data = {
             "ticket_id": req.state.get("ticket_id"),
             "customer_name": req.state.get("customer_name"),
-            "customer_email": req.state.get("email", "").lower(),
+            "customer_email": req.state.get("normalized", {}).get("email", ""),
             "query": req.state.get("query"),
             "priority": req.state.get("priority"),
             "intent": req.state.get("intent"),
             "sentiment": req.state.get("sentiment"),
-            "status": req.state.get("status", "open"),
-            "created_at": datetime.now(),
             "escalated": req.state.get("escalated", False)
         }
         
-        db.tickets.insert_one(ticket_data)
+        # Status and creation time only apply to new tickets; update_ticket owns status afterwards
+        await write_buffer.upsert_ticket(
+            ticket_data["ticket_id"],
+            ticket_data,
+            on_insert={"status": req.state.get("status", "open"), "created_at": datetime.utcnow()},
+        )
         return {"stored": True, "ticket_id": ticket_data["ticket_id"]}
     except Exception as e:
         return get_mock_response("store_ticket", req.state)
 
 @app.post("/abilities/execute_api_calls")
-def execute_api_calls(req: Request):
+async def execute_api_calls(req: Request = Depends(parse_request)):
     """Execute API calls based on ticket resolution"""
     actions = []
     
@@ -442,7 +629,7 @@ def execute_api_calls(req: Request):
     return {"api_actions": actions}
 
 @app.post("/abilities/trigger_notifications")
-def trigger_notifications(req: Request):
+async def trigger_notifications(req: Request = Depends(parse_request)):
     """Trigger various notifications"""
     notifications = []
     
@@ -457,32 +644,69 @@ def trigger_notifications(req: Request):
     return {"notifications": notifications}
 
 @app.post("/abilities/store_conversation_log") 
-def store_conversation_log(req: Request):
+async def store_conversation_log(req: Request = Depends(parse_request)):
     """Store conversation log"""
     if db is None:
         return get_mock_response("store_conversation_log", req.state)
     
     try:
         log_data = {
+            "_id": ObjectId(),
             "ticket_id": req.state.get("ticket_id"),
             "conversation_log": req.state.get("logs", []),
             "final_state": req.state,
-            "timestamp": datetime.now()
+            "timestamp": datetime.utcnow()
         }
         
-        db.conversation_logs.insert_one(log_data)
-        return {"log_stored": True, "conversation_id": str(log_data["_id"]) if "_id" in log_data else "unknown"}
+        await write_buffer.insert_log(log_data)
+        return {"log_stored": True, "conversation_id": str(log_data["_id"])}
     except Exception as e:
         return get_mock_response("store_conversation_log", req.state)
 
+# Ability name → handler, used by the batch endpoint and in-process clients
+REGISTRY = {
+    "extract_entities": extract_entities,
+    "enrich_records": enrich_records,
+    "get_customer_history": get_customer_history,
+    "clarify_question": clarify_question,
+    "extract_answer": extract_answer,
+    "knowledge_base_search": search_knowledge_base,
+    "search_knowledge_base": search_knowledge_base,
+    "escalation_decision": escalation_decision,
+    "update_ticket": update_ticket,
+    "close_ticket": close_ticket,
+    "update_ticket_status": update_ticket_status,
+    "store_ticket": store_ticket,
+    "execute_api_calls": execute_api_calls,
+    "trigger_notifications": trigger_notifications,
+    "store_conversation_log": store_conversation_log,
+}
+
+@app.post("/abilities:batch")
+async def run_batch(request: HTTPRequest):
+    """Run several abilities in one round trip; results come back in call order"""
+    calls = orjson.loads(await request.body())["calls"]
+
+    async def run_one(call: Dict[str, Any]) -> Dict[str, Any]:
+        handler = REGISTRY.get(call.get("ability"))
+        if handler is None:
+            return {"error": f"Unknown ability: {call.get('ability')}"}
+        try:
+            result = await handler(Request(call.get("payload"), call.get("state")))
+            return {"result": result}
+        except Exception as e:
+            return {"error": str(e)}
+
+    return {"results": await asyncio.gather(*(run_one(call) for call in calls))}
+
 @app.post("/abilities/test")
-def test_mongodb(req: Request):
+async def test_mongodb(req: Request = Depends(parse_request)):
     """Test MongoDB connection"""
     if db is None:
         return {"error": "MongoDB not connected", "db_status": "None"}
     
     try:
-        result = db.test_collection.find_one({})
+        result = await db.test_collection.find_one({})
         return {
             "success": True,
             "db_status": "connected",
@@ -494,5 +718,19 @@ def test_mongodb(req: Request):
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting Atlas MCP server on port 8002...")
+    
+    # Index migrations run once here rather than racing in every worker's startup
+    asyncio.run(migrate_indexes())
 
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    # Shed load past 256 in-flight requests instead of queueing without bound
+    uvicorn.run(
+        "atlas_mcp:app",
+        host="0.0.0.0",
+        port=8002,
+        loop="uvloop",
+        http="httptools",
+        workers=max(2, (os.cpu_count() or 1) // 2),
+        access_log=False,
+        limit_concurrency=256,
+        backlog=2048,
+    )